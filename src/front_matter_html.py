@@ -1,5 +1,42 @@
 import html
+import string
+from functools import lru_cache
 
+# --- Page Templates ---
+# Built once at import time; get_front_matter_html only substitutes the escaped values.
+# Use divs with classes for styling and page breaks
+_TITLE_PAGE_TPL = string.Template("""
+<div class="title-page">
+    <div class="title-content">
+        <h1>$title</h1>
+        $subtitle_block
+        <p class="author">by William Shakespeare</p>
+        <p class="adapter">Adapted and Translated by $adapter</p>
+    </div>
+</div>
+""") # CSS will handle page break after this div
+
+# Using <p> tags and relying on CSS for small font size and spacing
+_COPYRIGHT_TPL = string.Template("""
+<div class="copyright-page">
+    <p>Copyright &copy; $year $holder<br/>
+    All rights reserved.</p>
+    <br/>
+    <p>Based on the public domain work <i>Romeo and Juliet</i> by William Shakespeare.</p>
+    <br/>
+    <p>ISBN: [KDP Will Provide - Add Later if Needed]</p>
+    <br/>
+    <p><b>Note on Translation:</b><br/>
+    This work is an experimental adaptation of Shakespeare's <i>Romeo and Juliet</i>,
+    reimagining the dialogue in a contemporary British urban vernacular for creative
+    exploration. The translation was generated with assistance from Google AI models
+    (Gemini/Gemma) and subsequently reviewed and edited. It aims to explore language
+    and character through a modern lens and is not intended as a literal or scholarly
+    translation. Reader discretion regarding language and style is advised.</p>
+</div>
+""") # CSS will handle page break after this div (or let main content start)
+
+@lru_cache(maxsize=16) # Pure function of its arguments; the result is an immutable str
 def get_front_matter_html(title, subtitle, adapter_name, copyright_holder, current_year):
     """
     Generates the HTML string for the Title and Copyright pages.
@@ -21,38 +58,11 @@ def get_front_matter_html(title, subtitle, adapter_name, copyright_holder, curre
     safe_holder = html.escape(copyright_holder)
 
     # --- Title Page HTML ---
-    # Use divs with classes for styling and page breaks
-    title_page_html = f"""
-<div class="title-page">
-    <div class="title-content">
-        <h1>{safe_title}</h1>
-        {'<h2>' + safe_subtitle + '</h2>' if safe_subtitle else ''}
-        <p class="author">by William Shakespeare</p>
-        <p class="adapter">Adapted and Translated by {safe_adapter}</p>
-    </div>
-</div>
-""" # CSS will handle page break after this div
+    subtitle_block = f"<h2>{safe_subtitle}</h2>" if safe_subtitle else ""
+    title_page_html = _TITLE_PAGE_TPL.substitute(title=safe_title, subtitle_block=subtitle_block, adapter=safe_adapter)
 
     # --- Copyright Page HTML ---
-    # Using <p> tags and relying on CSS for small font size and spacing
-    copyright_page_html = f"""
-<div class="copyright-page">
-    <p>Copyright &copy; {current_year} {safe_holder}<br/>
-    All rights reserved.</p>
-    <br/>
-    <p>Based on the public domain work <i>Romeo and Juliet</i> by William Shakespeare.</p>
-    <br/>
-    <p>ISBN: [KDP Will Provide - Add Later if Needed]</p>
-    <br/>
-    <p><b>Note on Translation:</b><br/>
-    This work is an experimental adaptation of Shakespeare's <i>Romeo and Juliet</i>,
-    reimagining the dialogue in a contemporary British urban vernacular for creative
-    exploration. The translation was generated with assistance from Google AI models
-    (Gemini/Gemma) and subsequently reviewed and edited. It aims to explore language
-    and character through a modern lens and is not intended as a literal or scholarly
-    translation. Reader discretion regarding language and style is advised.</p>
-</div>
-""" # CSS will handle page break after this div (or let main content start)
+    copyright_page_html = _COPYRIGHT_TPL.substitute(year=current_year, holder=safe_holder)
 
     # --- Optional Blank Page After Copyright (if needed for Prologue on recto) ---
     # Depending on CSS and flow, might not be necessary. Add if required.
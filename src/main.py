@@ -5,48 +5,112 @@ import sys
 
 # --- Add project root to sys.path ---
 # This ensures Python can find the 'src' package when running main.py directly
-# Calculates the project root directory (the parent of 'src')
-PROJECT_ROOT_FOR_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-if PROJECT_ROOT_FOR_PATH not in sys.path:
-    sys.path.insert(0, PROJECT_ROOT_FOR_PATH)
+# The project root is the parent of 'src' (falls back to the working directory)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) or os.path.abspath('.')
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
 # --- End sys.path modification ---
 
-import google.generativeai as genai
+# google.generativeai and the PDF generator are imported where they are used:
+# together they take most of the startup time, and a resumed run may not need them
 from dotenv import load_dotenv
 import time
-import pickle
-import sys
-from src.pdf_generator_weasyprint import create_pdf_weasyprint
-
-# Ensure the parser can be found (if running main.py from project root)
-# If 'src' is not in the Python path, this helps find the parser module
-try:
-    from src.parser import parse_play
-except ImportError:
-    # If run with 'python src/main.py', src might not be in path directly
-    # Add project root to path to allow 'from src.parser import ...'
-    project_root_for_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    if project_root_for_path not in sys.path:
-        sys.path.insert(0, project_root_for_path)
-    from src.parser import parse_play
+import datetime
+import json
+import orjson
+import pickle # Only for migrating pre-JSON checkpoints
+import random
+import threading
+import logging
+import logging.handlers
+import argparse
+from functools import lru_cache
+from itertools import groupby
+from bisect import bisect_left
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from src.parser import parse_play
+from src.translation_cache import TranslationCache, cache_key
 
 # --- Configuration ---
 # Define file paths relative to the project root
-try:
-    PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    if not PROJECT_ROOT: # Handle potential issues finding root
-       PROJECT_ROOT = os.path.abspath('.')
-except NameError:
-    # If __file__ is not defined (e.g. in some interactive environments)
-    PROJECT_ROOT = os.path.abspath('.')
-
 DATA_FILE = os.path.join(PROJECT_ROOT, 'data', 'romeo_and_juliet.txt')
 CHECKPOINT_DIR = os.path.join(PROJECT_ROOT, 'checkpoints')
-CHECKPOINT_FILE = os.path.join(CHECKPOINT_DIR, 'translation_progress.pkl')
+CHECKPOINT_FILE = os.path.join(CHECKPOINT_DIR, 'translation_progress.json')
+LEGACY_CHECKPOINT_FILE = os.path.join(CHECKPOINT_DIR, 'translation_progress.pkl') # Pickle format used by older runs
+TRANSLATION_LOG_FILE = os.path.join(CHECKPOINT_DIR, 'translation_progress.jsonl') # Appended after every chunk
+TRANSLATION_CACHE_FILE = os.path.join(CHECKPOINT_DIR, 'translation_cache') # shelve database: hashed (instructions, type, speaker, text) -> translation
 OUTPUT_DIR = os.path.join(PROJECT_ROOT, 'output') # Define for later PDF output
 
+# --- Translation Settings ---
+MODEL_NAME = 'gemma-3-27b-it' # Check available models, 'gemini-pro' is common
+CACHE_TTL = datetime.timedelta(hours=1) # Lifetime of the cached system instruction
+API_TRANSPORT = 'grpc' # One persistent HTTP/2 channel, multiplexed across worker threads
+LENGTH_BUCKETS = (40, 100, 250) # Chunk length cut-offs (chars) for grouping similar-sized chunks into batches
+BATCH_SIZE = 20 # Chunks packed into one multi-item translation prompt
+MAX_WORKERS = 8 # Batches in flight at once; only hides request latency, see REQUESTS_PER_MINUTE
+REQUESTS_PER_MINUTE = 30 # Gemma 3 free-tier quota; the shared limiter caps throughput here, not MAX_WORKERS
+MAX_RETRIES = 5 # Retries for a rate-limited (429) API call before giving up
+RETRY_BASE_DELAY = 1 # Seconds before the first retry; doubled on each further retry
+RETRY_MAX_DELAY = 60 # Upper bound on a single backoff delay, in seconds
+CHUNK_PLACEHOLDER = '[Translated as part of previous chunk]'
+TRANSLATABLE_TYPES = {'dialogue', 'stage_direction'}
+STYLE_INSTRUCTION = "contemporary British urban vernacular (similar to the 'Chav' style previously discussed, focus on informal language, slang, potentially dropping 'h's or 'g's subtly where natural, but prioritize clarity and character voice over heavy caricature)"
+# Shared by every prompt; uploaded once via context caching where the model supports it
+SYSTEM_INSTRUCTION = f"""Directly translate the Shakespearean text you are given into {STYLE_INSTRUCTION}. Maintain line breaks roughly where they occur in the original if possible, but prioritize natural flow in the target vernacular.
+Do not provide commentary, explanations, or multiple options. Only provide the single best translation in the requested style."""
+# Fixed header of a multi-chunk prompt; only the chunk count varies
+MULTI_PROMPT_HEAD = """Translate each of the following {count} text chunks. Each chunk is given as a JSON string; keep its "\\n" line breaks.
+Return ONLY a JSON array of {count} strings, one translation per chunk, in the same order.
+"""
+
+LOG_BUFFER_CAPACITY = 500 # Log records buffered between flushes during translation
+
+# Translation progress goes through this logger; see configure_logging
+log = logging.getLogger('rj')
+
 # --- Helper Functions ---
 
+def configure_logging(verbose=False):
+    """
+    Sends the 'rj' logger to stdout through a buffering MemoryHandler.
+
+    Worker threads only append records to the buffer; the main thread writes
+    them out with flush_log() after each batch, so a slow or blocked stdout
+    never stalls an API call. Errors are written immediately.
+
+    Args:
+        verbose (bool): Also log every translation as it arrives (DEBUG level).
+    """
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(logging.Formatter('%(message)s'))
+    memory_handler = logging.handlers.MemoryHandler(LOG_BUFFER_CAPACITY, flushLevel=logging.ERROR,
+                                                    target=stream_handler)
+    log.handlers[:] = [memory_handler]
+    log.setLevel(logging.DEBUG if verbose else logging.INFO)
+    log.propagate = False
+
+def flush_log():
+    """Writes out any buffered log records."""
+    for handler in log.handlers:
+        handler.flush()
+
+class RateLimiter:
+    """Paces API calls from all worker threads to a shared requests-per-minute budget."""
+
+    def __init__(self, requests_per_minute):
+        self.interval = 60.0 / requests_per_minute
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+
+    def wait(self):
+        """Blocks until the caller may issue its next API call."""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
 def load_api_key():
     """Loads the Gemini API key from .env file."""
     load_dotenv(dotenv_path=os.path.join(PROJECT_ROOT, '.env')) # Specify path to .env
@@ -55,43 +119,396 @@ def load_api_key():
         raise ValueError("Gemini API Key not found. Make sure it's set in your .env file in the project root.")
     return api_key
 
-def load_checkpoint(filepath):
-    """Loads the play structure from a checkpoint file if it exists."""
+def load_checkpoint(filepath, log_path=None):
+    """
+    Loads the play structure from a checkpoint file if it exists.
+
+    If `log_path` is given, translations appended to that log since the
+    checkpoint was written are replayed on top of it. Checkpoints are JSON;
+    pickle files from older runs are still read so they can be migrated.
+    """
     if os.path.exists(filepath):
         print(f"Loading checkpoint from: {filepath}")
         try:
             with open(filepath, 'rb') as f:
-                return pickle.load(f)
-        except (pickle.UnpicklingError, EOFError, FileNotFoundError, Exception) as e:
+                raw = f.read()
+            if raw[:1] == b'\x80': # Pickle protocol 2+ magic byte: legacy checkpoint
+                data = pickle.loads(raw)
+            else:
+                data = orjson.loads(raw)
+        except (pickle.UnpicklingError, orjson.JSONDecodeError, EOFError, FileNotFoundError, Exception) as e:
             print(f"Warning: Error loading checkpoint ({e}). Starting fresh parse.")
             # Optionally delete corrupted checkpoint: os.remove(filepath)
             return None
+        if log_path:
+            replay_translation_log(data, log_path)
+        return data
     return None
 
+def intern_play_strings(play_structure):
+    """
+    Interns the element types and speaker names of a loaded play structure.
+
+    JSON decoding creates a fresh string for every occurrence; interning lets
+    the thousands of repeated values share one object each, as a fresh parse does.
+    """
+    for element in play_structure:
+        element['type'] = sys.intern(element['type'])
+        if element['type'] == 'speaker':
+            element['original'] = sys.intern(element['original'])
+
 def save_checkpoint(data, filepath):
-    """Saves the play structure to a checkpoint file."""
+    """
+    Saves the play structure to a checkpoint file, replacing it atomically.
+
+    Returns:
+        bool: True if the checkpoint was written.
+    """
     try:
         os.makedirs(os.path.dirname(filepath), exist_ok=True) # Ensure dir exists
-        with open(filepath, 'wb') as f:
-            pickle.dump(data, f)
+        temp_filepath = filepath + '.tmp'
+        with open(temp_filepath, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE))
+        os.replace(temp_filepath, filepath) # Never leaves a half-written checkpoint behind
         # print(f"Checkpoint saved to: {filepath}") # Make less verbose during loop
+        return True
     except Exception as e:
         print(f"Error saving checkpoint: {e}")
+        return False
+
+def save_final_state(play_structure):
+    """
+    Saves the play structure checkpoint.
+
+    Once the checkpoint holds every translation, the translation log is
+    removed so the next run does not replay it again.
+    """
+    if save_checkpoint(play_structure, CHECKPOINT_FILE) and os.path.exists(TRANSLATION_LOG_FILE):
+        os.remove(TRANSLATION_LOG_FILE)
+
+def append_translations(entries, log_path):
+    """
+    Appends element translations to the translation log in a single write.
+
+    Args:
+        entries (list): (element index, translated text) pairs.
+        log_path (str): Path of the JSONL translation log.
+    """
+    if not entries:
+        return
+    lines = b"".join(orjson.dumps({'i': idx, 't': translated}, option=orjson.OPT_APPEND_NEWLINE)
+                     for idx, translated in entries)
+    try:
+        with open(log_path, 'ab') as f:
+            f.write(lines)
+    except Exception as e:
+        print(f"Error appending to translation log: {e}")
+
+def replay_translation_log(play_structure, log_path):
+    """Applies every entry of the translation log to the play structure."""
+    if not os.path.exists(log_path):
+        return
+    replayed = 0
+    complete_bytes = 0 # Length of the log up to its last complete line
+    with open(log_path, 'rb') as f:
+        for line in f:
+            if not line.endswith(b'\n'):
+                break # A run killed mid-write can leave a partial last line
+            complete_bytes += len(line)
+            try:
+                entry = orjson.loads(line)
+                play_structure[entry['i']]['translated'] = entry['t']
+                replayed += 1
+            except (ValueError, KeyError, IndexError, TypeError):
+                print("Warning: Skipping unreadable translation log entry.")
+    if complete_bytes < os.path.getsize(log_path):
+        print("Warning: Dropping partially written last entry of translation log.")
+        with open(log_path, 'r+b') as f:
+            f.truncate(complete_bytes) # So the next append starts on a fresh line
+    print(f"Replayed {replayed} entries from translation log: {log_path}")
+
+def create_translation_model():
+    """
+    Creates the translation model, caching the shared system instruction if possible.
+
+    Context caching needs model support and a minimum prompt size, so any failure
+    falls back to a plain model with the instruction sent inline instead.
+
+    Returns:
+        tuple: (model, prompt_prefix). prompt_prefix is empty when the instruction
+               is held in the context cache, otherwise it must be prepended to
+               every prompt.
+    """
+    import google.generativeai as genai
+    try:
+        cached = genai.caching.CachedContent.create(model=f'models/{MODEL_NAME}',
+                                                    system_instruction=SYSTEM_INSTRUCTION,
+                                                    ttl=CACHE_TTL)
+        print(f"System instruction cached as {cached.name}.")
+        return genai.GenerativeModel.from_cached_content(cached), ""
+    except Exception as e:
+        print(f"Context caching unavailable ({e}). Sending instructions with every prompt.")
+        return genai.GenerativeModel(MODEL_NAME), SYSTEM_INSTRUCTION + "\n\n"
+
+@lru_cache(maxsize=None)
+def speaker_line(speaker):
+    """Returns the prompt line naming a speaker, built once per character."""
+    return f"Speaker: {speaker}\n"
+
+@lru_cache(maxsize=None)
+def chunk_label(element_type, speaker):
+    """Returns the bracketed label for one chunk of a multi-chunk prompt."""
+    if element_type == 'dialogue' and speaker:
+        return f"[DIALOGUE, speaker={speaker}]"
+    elif element_type == 'dialogue':
+        return "[DIALOGUE]"
+    else:
+        return "[STAGE]"
+
+def build_prompt(original_text, element_type, speaker):
+    """Builds the per-chunk part of a translation prompt (without SYSTEM_INSTRUCTION)."""
+    prefix = speaker_line(speaker) if speaker and element_type == 'dialogue' else ""
+    return prefix + 'Original: "' + original_text + '"\nTranslation:'
+
+def build_multi_prompt(items):
+    """
+    Builds one prompt asking for a JSON array with a translation per chunk.
+
+    Args:
+        items (list): Job dictionaries as returned by collect_translation_jobs.
+
+    Returns:
+        str: Prompt listing every chunk, numbered in order, with its type and speaker
+             (without SYSTEM_INSTRUCTION).
+    """
+    lines = [MULTI_PROMPT_HEAD.format(count=len(items))]
+    for number, item in enumerate(items, 1):
+        lines.append(f"{number}. {chunk_label(item['type'], item['speaker'])} {json.dumps(item['original'], ensure_ascii=False)}")
+    return "\n".join(lines)
+
+def parse_multi_response(text, expected_count):
+    """Parses a JSON-array response, returning None unless it holds `expected_count` non-empty strings."""
+    text = text.strip()
+    # Tolerate a Markdown code fence around the array
+    if text.startswith("```"):
+        text = text.strip("`").strip()
+        if text.startswith("json"):
+            text = text[4:]
+    try:
+        translations = json.loads(text)
+    except ValueError:
+        return None
+    if (not isinstance(translations, list) or len(translations) != expected_count or
+            not all(isinstance(t, str) for t in translations)):
+        return None
+    translations = [t.strip() for t in translations]
+    # An empty entry would be stored and cached as a successful translation
+    if not all(translations):
+        return None
+    return translations
+
+def collect_translation_jobs(play_structure):
+    """
+    Walks the play structure once and gathers every untranslated chunk.
+
+    Consecutive dialogue lines from the same speaker are grouped into one chunk;
+    stage directions are always translated individually.
+
+    Args:
+        play_structure (list): List of dictionaries representing the play.
+
+    Returns:
+        list: Ordered list of job dictionaries with keys 'indices' (element
+              indices covered by the chunk), 'type', 'speaker' and 'prompt'.
+    """
+    # Column views of the fields used below, plus the most recent speaker before
+    # each element, built in one forward pass; the key function below then only
+    # indexes lists instead of looking up dict keys
+    types = []
+    originals = []
+    is_translated = []
+    speaker_before = []
+    current_speaker = None
+    for element in play_structure:
+        types.append(element['type'])
+        originals.append(element['original'])
+        is_translated.append(bool(element.get('translated')))
+        speaker_before.append(current_speaker)
+        if element['type'] == 'speaker':
+            current_speaker = element['original']
+
+    def chunk_key(index):
+        """Groups adjacent pending dialogue by speaker; None marks elements to skip."""
+        element_type = types[index]
+        if element_type not in TRANSLATABLE_TYPES or is_translated[index]:
+            return None
+        if element_type == 'dialogue':
+            return ('dialogue', speaker_before[index])
+        return ('stage_direction', index) # Stage direction - process individually
+
+    # One forward pass: each run of equal keys is one chunk
+    jobs = []
+    for key, group in groupby(range(len(play_structure)), key=chunk_key):
+        if key is None:
+            continue
+        element_type = key[0]
+        context_speaker = key[1] if element_type == 'dialogue' else None # No speaker context for directions
+        indices_in_chunk = list(group)
+
+        full_original_text = "\n".join(originals[k] for k in indices_in_chunk)
+        jobs.append({
+            'indices': indices_in_chunk,
+            'type': element_type,
+            'speaker': context_speaker,
+            'original': full_original_text,
+            'prompt': build_prompt(full_original_text, element_type, context_speaker),
+        })
+    return jobs
+
+def length_bucket(job):
+    """Returns the LENGTH_BUCKETS index a chunk's original text falls into."""
+    return bisect_left(LENGTH_BUCKETS, len(job['original']))
+
+def translation_cache_key(job):
+    """Returns the key identifying a chunk's translation in the translation cache."""
+    speaker = job['speaker'] if job['type'] == 'dialogue' else None
+    return cache_key(SYSTEM_INSTRUCTION, job['type'], speaker, job['original'])
+
+def apply_translation(play_structure, job, result):
+    """
+    Writes a chunk's result back onto its elements.
+
+    Returns:
+        bool: True if `result` is a translation, False if it is an error marker.
+    """
+    indices_in_chunk = job['indices']
+    if result.startswith('[Translation'):
+        # If translation failed, mark all elements in chunk with error
+        for k in indices_in_chunk:
+            play_structure[k]['translated'] = result
+        return False
+    # Store full translation on the *first* element of the chunk
+    play_structure[indices_in_chunk[0]]['translated'] = result
+    # Mark subsequent elements in the chunk
+    for k in indices_in_chunk[1:]:
+        play_structure[k]['translated'] = CHUNK_PLACEHOLDER
+    return True
+
+def generate_with_retry(model, prompt_text, rate_limiter):
+    """
+    Calls model.generate_content, backing off and retrying while rate limited.
+
+    Only ResourceExhausted (HTTP 429) is retried, with exponential backoff plus
+    jitter; every other error and blocked responses are returned or raised as-is.
+    """
+    from google.api_core import exceptions as google_exceptions
+    for attempt in range(MAX_RETRIES + 1):
+        rate_limiter.wait()
+        try:
+            return model.generate_content(prompt_text)
+        except google_exceptions.ResourceExhausted as e:
+            if attempt == MAX_RETRIES:
+                raise
+            delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt) + random.uniform(0, 1)
+            log.warning(f"-> Rate limited ({e}). Retrying in {delay:.1f}s...")
+            time.sleep(delay)
+
+def translate_one(model, prompt_text, rate_limiter):
+    """
+    Translates a single prompt with a real-time API call.
+
+    Returns:
+        str: The translation, or a '[Translation ...]' marker string on failure.
+    """
+    try:
+        # --- Call Gemini API ---
+        response = generate_with_retry(model, prompt_text, rate_limiter)
+
+        # --- Process Response ---
+        if response.parts:
+             full_translation = response.text.strip()
+             log.debug(f"-> Translation: {full_translation[:150]}...")
+             return full_translation
+        elif response.prompt_feedback.block_reason:
+             log.warning(f"-> Blocked. Reason: {response.prompt_feedback.block_reason}")
+             return f"[Translation Blocked: {response.prompt_feedback.block_reason}]"
+        else:
+             log.warning("-> Received empty response from API.")
+             return "[Translation Error: Empty Response]"
+
+    except Exception as e:
+        log.warning(f"-> API Error: {e}")
+        return f"[Translation Error: {type(e).__name__}]"
+
+def translate_batch(model, jobs, rate_limiter, prompt_prefix=""):
+    """
+    Translates a batch of jobs, returning one result string per job.
+
+    All chunks are packed into a single prompt that asks for a JSON array of
+    translations. The array is requested in the prompt only, not through the
+    API's JSON response mode, which Gemma models reject. If the response is
+    blocked, empty or does not parse into one entry per chunk, the batch falls
+    back to one real-time call per chunk. If the call itself fails, every job
+    gets an error marker instead, since the same error would hit each chunk.
+
+    Args:
+        model: The configured genai.GenerativeModel.
+        jobs (list): Job dictionaries as returned by collect_translation_jobs.
+        rate_limiter (RateLimiter): Shared limiter consulted before every API call.
+        prompt_prefix (str): Instructions prepended to each prompt (see create_translation_model).
+
+    Returns:
+        list: Translations in the same order as `jobs`. Failed jobs yield a
+              '[Translation ...]' marker string instead of a translation.
+    """
+    try:
+        response = generate_with_retry(model, prompt_prefix + build_multi_prompt(jobs), rate_limiter)
+    except Exception as e:
+        log.warning(f"-> API Error on batch prompt: {e}")
+        return [f"[Translation Error: {type(e).__name__}]"] * len(jobs)
+
+    try:
+        translations = parse_multi_response(response.text, len(jobs)) if response.parts else None
+    except ValueError as e: # A blocked prompt has no candidates, so the accessors raise
+        log.warning(f"-> Batch prompt blocked: {e}")
+        translations = None
+
+    if translations is not None:
+        for translation in translations:
+            log.debug(f"-> Translation: {translation[:150]}...")
+        return translations
+
+    log.warning(f"-> Batch response unusable, translating {len(jobs)} chunks individually...")
+    results = []
+    for job in jobs:
+        results.append(translate_one(model, prompt_prefix + job['prompt'], rate_limiter))
+    return results
 
 # --- Main Execution Logic ---
 
-def main():
-    """Main function to parse, translate, and eventually generate PDF."""
+def main(verbose=False):
+    """
+    Main function to parse, translate, and eventually generate PDF.
+
+    Args:
+        verbose (bool): Print every translation as it arrives.
+    """
+    configure_logging(verbose)
     print("--- Starting Romeo & Juliet Translation Project ---")
     start_time = time.time()
+    os.makedirs(OUTPUT_DIR, exist_ok=True) # Ensure output dir exists before any work is done
 
     # 1. Load API Key and Configure Gemini
     try:
         api_key = load_api_key()
-        genai.configure(api_key=api_key)
-        # Specify model - check available models, 'gemini-pro' is common
-        model = genai.GenerativeModel('gemma-3-27b-it')
-        print("Gemini API configured successfully.")
+        import google.generativeai as genai
+        from google.generativeai.client import get_default_generative_client
+        genai.configure(api_key=api_key, transport=API_TRANSPORT)
+        # The SDK creates its client lazily and without a lock; create it now so the
+        # worker threads all share this one connection instead of racing to open their own
+        get_default_generative_client()
+        model, prompt_prefix = create_translation_model()
+        print(f"Gemini API configured successfully ({API_TRANSPORT} transport).")
     except ValueError as e:
         print(f"Configuration Error: {e}")
         return # Exit if API key is missing
@@ -100,7 +517,9 @@ def main():
         return
 
     # 2. Load or Parse Play Structure
-    play_structure = load_checkpoint(CHECKPOINT_FILE)
+    # Older runs saved a pickle; it is re-saved as JSON with the next checkpoint
+    checkpoint_to_load = CHECKPOINT_FILE if os.path.exists(CHECKPOINT_FILE) else LEGACY_CHECKPOINT_FILE
+    play_structure = load_checkpoint(checkpoint_to_load, TRANSLATION_LOG_FILE)
     if play_structure is None:
         print(f"No valid checkpoint found. Parsing source file: {DATA_FILE}")
         try:
@@ -109,8 +528,10 @@ def main():
                 print("Parsing failed or returned empty structure. Exiting.")
                 return
             print(f"Parsing complete. Found {len(play_structure)} elements.")
-            # Save initial parsed structure as first checkpoint
+            # Save initial parsed structure as first checkpoint, discarding any stale log
             save_checkpoint(play_structure, CHECKPOINT_FILE)
+            if os.path.exists(TRANSLATION_LOG_FILE):
+                os.remove(TRANSLATION_LOG_FILE)
             print(f"Initial checkpoint saved to {CHECKPOINT_FILE}")
         except FileNotFoundError as e:
             print(f"Error: Source file not found at {DATA_FILE}")
@@ -120,163 +541,124 @@ def main():
             print(f"An unexpected error occurred during parsing: {e}")
             return
     else:
+         intern_play_strings(play_structure)
          already_translated_count = sum(1 for element in play_structure if element.get('translated'))
          print(f"Resumed from checkpoint. {len(play_structure)} elements loaded, {already_translated_count} previously translated.")
 
-    # 3. Translation Loop
-     # 3. Translation Loop (with Dialogue Chunking)
-    print("\n--- Translation Phase (Chunking Dialogue) ---")
+    # 3. Translation Loop (Batched, Concurrent)
+    # Pass 1 collects every pending chunk and its prompt without touching the API,
+    # pass 2 translates batches on a thread pool and writes results back by index
+    # as each batch completes. Workers never touch play_structure themselves.
+    # Every result is appended to the translation log, so the full checkpoint is
+    # only rewritten once at the end.
+    print("\n--- Translation Phase (Batched) ---")
     translated_chunks_in_session = 0 # Count chunks translated
+    cached_chunks_in_session = 0 # Count chunks served from the translation cache
+    duplicate_chunks_in_session = 0 # Count repeated chunks filled from an identical chunk's translation
     api_errors = 0
-    CHECKPOINT_INTERVAL = 10  # Save progress every N CHUNKS translated
-    TRANSLATION_DELAY = 2 # Seconds between API calls
-
     total_elements = len(play_structure)
-    index = 0
-    while index < total_elements:
-        element = play_structure[index]
-        element_type = element.get('type')
-
-        # --- Find speaker for context ---
-        # Find the most recent speaker BEFORE the current index
-        loop_current_speaker = None
-        for i in range(index - 1, -1, -1):
-            if play_structure[i].get('type') == 'speaker':
-                loop_current_speaker = play_structure[i].get('original')
-                break
-
-        # --- Check if element needs translation ---
-        needs_translation = False
-        if element_type in ['dialogue', 'stage_direction'] and not element.get('translated'):
-            needs_translation = True
-
-        if not needs_translation:
-            index += 1
-            continue # Move to the next element
-
-        # --- Process Translation ---
-        original_texts_chunk = []
-        indices_in_chunk = []
-        context_speaker = loop_current_speaker # Speaker context for this chunk
-
-        # If it's dialogue, try to chunk consecutive lines from the same speaker
-        if element_type == 'dialogue':
-            chunk_speaker = loop_current_speaker
-            # Look ahead to gather consecutive dialogue from the same speaker
-            j = index
-            while j < total_elements:
-                next_element = play_structure[j]
-                # Find speaker for next element if needed (only matters for dialogue)
-                next_speaker = None
-                if next_element.get('type') == 'dialogue':
-                     for i in range(j - 1, -1, -1):
-                        if play_structure[i].get('type') == 'speaker':
-                            next_speaker = play_structure[i].get('original')
-                            break
-
-                # Conditions to continue chunk: same type, same speaker, not already translated
-                if (next_element.get('type') == 'dialogue' and
-                        next_speaker == chunk_speaker and
-                        not next_element.get('translated')):
-                    original_texts_chunk.append(next_element['original'])
-                    indices_in_chunk.append(j)
-                    j += 1
-                else:
-                    break # End of chunk
-            # Update outer loop index to skip processed elements
-            next_index_after_chunk = j
-        else:
-            # Stage direction - process individually
-            original_texts_chunk.append(element['original'])
-            indices_in_chunk.append(index)
-            next_index_after_chunk = index + 1
-            context_speaker = None # No speaker context for directions
-
-
-        # --- Translate the gathered chunk ---
-        if original_texts_chunk:
-            full_original_text = "\n".join(original_texts_chunk)
-            print(f"\nTranslating chunk starting element {indices_in_chunk[0] + 1}/{total_elements} ({element_type}, {len(indices_in_chunk)} lines)...")
-            print(f"Original: {full_original_text[:150]}...")
-
-            # Construct the prompt
-            style_instruction = "contemporary British urban vernacular (similar to the 'Chav' style previously discussed, focus on informal language, slang, potentially dropping 'h's or 'g's subtly where natural, but prioritize clarity and character voice over heavy caricature)"
-            context = f" The speaker is {context_speaker}." if context_speaker and element_type == 'dialogue' else ""
-            prompt_text = f"""Directly translate the following Shakespearean text chunk into {style_instruction}.{context} Maintain line breaks roughly where they occur in the original if possible, but prioritize natural flow in the target vernacular.
-Do not provide commentary, explanations, or multiple options. Only provide the single best translation in the requested style.
-
-Original Chunk:
-"{full_original_text}"
 
-Translated Chunk:"""
-
-            translation_successful = False
-            try:
-                # --- Call Gemini API ---
-                response = model.generate_content(prompt_text)
-
-                # --- Process Response ---
-                if response.parts:
-                     full_translation = response.text.strip()
-                     # Store full translation on the *first* element of the chunk
-                     play_structure[indices_in_chunk[0]]['translated'] = full_translation
-                     # Mark subsequent elements in the chunk
-                     for k in indices_in_chunk[1:]:
-                         play_structure[k]['translated'] = '[Translated as part of previous chunk]'
-                     translated_chunks_in_session += 1
-                     translation_successful = True
-                     print(f"-> Translation: {full_translation[:150]}...")
-                elif response.prompt_feedback.block_reason:
-                     print(f"-> Blocked. Reason: {response.prompt_feedback.block_reason}")
-                     error_message = f"[Translation Blocked: {response.prompt_feedback.block_reason}]"
-                     api_errors += 1
-                else:
-                     print("-> Received empty response from API.")
-                     error_message = "[Translation Error: Empty Response]"
-                     api_errors += 1
-
-            except Exception as e:
-                print(f"-> API Error: {e}")
-                error_message = f"[Translation Error: {type(e).__name__}]"
-                api_errors += 1
-
-            # If translation failed, mark all elements in chunk with error
-            if not translation_successful:
-                for k in indices_in_chunk:
-                    play_structure[k]['translated'] = error_message
-
-            # --- Rate Limiting ---
-            time.sleep(TRANSLATION_DELAY)
-
-            # --- Save Checkpoint Periodically (based on chunks) ---
-            if translated_chunks_in_session > 0 and translated_chunks_in_session % CHECKPOINT_INTERVAL == 0:
-                print(f"\n--- Saving checkpoint after {translated_chunks_in_session} chunks translated in this session ---")
-                save_checkpoint(play_structure, CHECKPOINT_FILE)
-
-        # Advance outer loop index
-        index = next_index_after_chunk
+    # Repeated lines ("Exeunt.", "Ay.") are only sent to the API once, across runs
+    with TranslationCache(TRANSLATION_CACHE_FILE) as translation_cache:
+        # Identical chunks still pending in this run are sent once; the extra
+        # copies are kept under the cache key and get the same result
+        jobs = []
+        duplicate_jobs = {} # cache key -> further jobs with the same text and speaker
+        log_entries = []
+        for job in collect_translation_jobs(play_structure):
+            job['cache_key'] = translation_cache_key(job)
+            cached_translation = translation_cache.get(job['cache_key'])
+            if cached_translation is not None:
+                apply_translation(play_structure, job, cached_translation)
+                log_entries.extend((k, play_structure[k]['translated']) for k in job['indices'])
+                cached_chunks_in_session += 1
+            elif job['cache_key'] in duplicate_jobs:
+                duplicate_jobs[job['cache_key']].append(job)
+            else:
+                duplicate_jobs[job['cache_key']] = []
+                jobs.append(job)
+        append_translations(log_entries, TRANSLATION_LOG_FILE)
+        if cached_chunks_in_session:
+            print(f"{cached_chunks_in_session} chunks filled from the translation cache.")
+        duplicate_count = sum(len(extra_jobs) for extra_jobs in duplicate_jobs.values())
+        if duplicate_count:
+            print(f"{duplicate_count} repeated chunks will reuse the translation of an identical chunk.")
+        # A batch takes as long as its longest chunk, so batch similar lengths together;
+        # each prompt item carries its own speaker and results are routed back by index
+        jobs.sort(key=length_bucket)
+        batches = [jobs[start:start + BATCH_SIZE] for start in range(0, len(jobs), BATCH_SIZE)]
+        print(f"{len(jobs)} chunks pending translation ({len(batches)} batches of up to {BATCH_SIZE}, {MAX_WORKERS} workers).")
+
+        rate_limiter = RateLimiter(REQUESTS_PER_MINUTE)
+        completed_batches = 0
+        executor = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+        # Appends the translation log in the background, in submission order, so the
+        # main thread goes straight back to collecting results while the disk catches up
+        log_writer = ThreadPoolExecutor(max_workers=1)
+        try:
+            futures = {executor.submit(translate_batch, model, batch, rate_limiter, prompt_prefix): batch for batch in batches}
+            for future in as_completed(futures):
+                batch = futures[future]
+                results = future.result()
+
+                # --- Write results back by index and log them in one write ---
+                log_entries = []
+                for job, result in zip(batch, results):
+                    for same_job in [job] + duplicate_jobs[job['cache_key']]:
+                        translated = apply_translation(play_structure, same_job, result)
+                        log_entries.extend((k, play_structure[k]['translated']) for k in same_job['indices'])
+                    # API outcomes are counted once per request; the copies are counted apart
+                    if translated:
+                        translated_chunks_in_session += 1
+                        duplicate_chunks_in_session += len(duplicate_jobs[job['cache_key']])
+                        translation_cache.put(job['cache_key'], result)
+                    else:
+                        api_errors += 1
+                log_writer.submit(append_translations, log_entries, TRANSLATION_LOG_FILE)
+
+                completed_batches += 1
+                log.info(f"\nBatch {completed_batches}/{len(batches)} done (chunks starting element {batch[0]['indices'][0] + 1}/{total_elements}).")
+                flush_log() # Batch is done; write out its messages too
+        except KeyboardInterrupt:
+            # Drop queued batches and keep whatever has completed so far
+            print("\nInterrupted. Cancelling queued batches and saving progress...")
+            executor.shutdown(wait=False, cancel_futures=True)
+            log_writer.shutdown(wait=True) # The log must be complete before it is consolidated
+            save_final_state(play_structure)
+            raise
+        finally:
+            executor.shutdown(wait=False)
+            log_writer.shutdown(wait=True)
+            flush_log()
 
     # --- End of Loop ---
 
     print("\n--- Translation Phase Complete ---")
-    # Save final state
-    if translated_chunks_in_session > 0: # Only save if work was done
+    # Save final state, consolidating the translation log into one checkpoint.
+    # Nothing modifies play_structure from here on, so the save runs in the
+    # background while the PDF is generated and is joined before exiting.
+    final_save_thread = None
+    if translated_chunks_in_session > 0 or cached_chunks_in_session > 0: # Only save if work was done
          print("Saving final translation progress...")
-         save_checkpoint(play_structure, CHECKPOINT_FILE)
-
-    # Recalculate final counts
-    final_translated_count = sum(1 for element in play_structure if element.get('translated') and not element.get('translated','').startswith('[')) # Count successful non-error/placeholder translations
-    total_translatable = sum(1 for element in play_structure if element['type'] in ['dialogue', 'stage_direction'])
+         final_save_thread = threading.Thread(target=save_final_state, args=(play_structure,))
+         final_save_thread.start()
+
+    # Recalculate final counts in a single pass
+    total_translatable = translated_count = error_count = 0
+    for element in play_structure:
+        if element['type'] in TRANSLATABLE_TYPES:
+            total_translatable += 1
+            translated = element.get('translated')
+            if translated:
+                translated_count += 1
+                if translated.startswith('[Translation'):
+                    error_count += 1
     print(f"Translation Summary:")
     print(f"- Chunks translated in this session: {translated_chunks_in_session}")
-    # The 'final_translated_count' might be misleading now as it counts only first lines of chunks
-    # print(f"- Total successfully translated elements: {final_translated_count} / {total_translatable}") # This is less meaningful now
+    print(f"- Chunks served from translation cache: {cached_chunks_in_session}")
+    print(f"- Repeated chunks reusing an identical chunk's translation: {duplicate_chunks_in_session}")
     print(f"- API Errors/Blocks encountered: {api_errors}")
-    
-    # Example of how to check progress after loop (we'll build the loop next):
-    final_translated_count = sum(1 for element in play_structure if element.get('translated'))
-    total_translatable = sum(1 for element in play_structure if element['type'] in ['dialogue', 'stage_direction'])
-    print(f"Translation status: {final_translated_count} / {total_translatable} elements potentially translated.")
+    print(f"Translation status: {translated_count} / {total_translatable} elements translated ({error_count} marked with errors).")
 
 
     # 4. PDF Generation
@@ -285,7 +667,7 @@ Translated Chunk:"""
         pdf_output_filepath = os.path.join(OUTPUT_DIR, 'romeo_weasyprint_side_by_side.pdf') # New name
         css_filepath = os.path.join(PROJECT_ROOT, 'config', 'style_weasy.css') # Path to CSS
         try:
-            os.makedirs(OUTPUT_DIR, exist_ok=True) # Ensure output dir exists
+            from src.pdf_generator_weasyprint import create_pdf_weasyprint
             # NOTE: Need to create/update front_matter_html helper first!
             # For now, just call with main structure
             create_pdf_weasyprint(play_structure, pdf_output_filepath, css_filepath)
@@ -294,5 +676,11 @@ Translated Chunk:"""
     else:
         print("Skipping PDF generation because play structure is empty.")
 
+    if final_save_thread is not None:
+        final_save_thread.join()
+        print("Final translation progress saved.")
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    arg_parser = argparse.ArgumentParser(description="Translate Romeo and Juliet with Gemini and build a side-by-side PDF.")
+    arg_parser.add_argument('--verbose', action='store_true', help="print every translation as it arrives")
+    main(verbose=arg_parser.parse_args().verbose)
\ No newline at end of file
@@ -1,6 +1,22 @@
 # src/parser.py
 import re
 import os
+import sys
+import logging
+
+# Per-line classification messages are DEBUG; the __main__ block below shows them
+log = logging.getLogger(__name__)
+
+# Every line is classified by a single match against this alternation; the
+# name of the branch that matched (m.lastgroup) is the line's candidate kind.
+# The speaker and keyword branches can never both match (keywords are not all caps).
+_LINE_RE = re.compile(r'''^(?:
+    (?P<prologue>THE\ PROLOGUE$)                       # The one heading checked by name
+  | (?P<scene>(?:ACT|SCENE)\ )                         # Act/Scene markers
+  | (?P<speaker>(?P<name>[A-Z][A-Z\s]{1,})\.?$)        # ALL CAPS name, optional trailing period
+  | (?P<keyword>Enter\ |Exit\ |Exeunt|Re-enter\ )     # Common stage-direction openings
+)''', re.VERBOSE)
+_BRACKET_PAIRS = {'[': ']', '(': ')'} # Opening bracket -> closing bracket of a bracketed direction
 
 def parse_play(filepath):
     """
@@ -16,97 +32,109 @@ def parse_play(filepath):
     if not os.path.exists(filepath):
         raise FileNotFoundError(f"Input file not found at: {filepath}")
 
-    play_structure = []
-    current_speaker = None
-
     try:
-        # Use 'utf-8-sig' to automatically handle/remove the BOM if present
-        with open(filepath, 'r', encoding='utf-8-sig') as f:
-            for line_num, line in enumerate(f, 1): # Add line number for debugging if needed
-                stripped_line = line.strip()
-
-                # Skip empty lines
-                if not stripped_line:
-                    continue
-
-                # --- Perform necessary checks ONCE per line, UPFRONT ---
-                # Calculate these flags/matches for use in the conditional logic below
-                stage_direction_keywords = ['Enter ', 'Exit ', 'Exeunt', 'Re-enter ']
-                is_bracketed = (stripped_line.startswith('[') and stripped_line.endswith(']')) or \
-                               (stripped_line.startswith('(') and stripped_line.endswith(')'))
-                starts_with_keyword = any(stripped_line.startswith(keyword) for keyword in stage_direction_keywords)
-
-                # Perform the regex check for potential speakers
-                speaker_regex = r'^([A-Z][A-Z\s]{1,})(\.?)$'
-                is_likely_speaker = re.match(speaker_regex, stripped_line)
-                # --- End upfront checks ---
-
-
-                # --- Start the main conditional chain to classify the line type ---
-                # Order Matters! Check most specific types first.
-
-                # Check for specific known headings first
-                if stripped_line == 'THE PROLOGUE': # Specific check is robust
-                    play_structure.append({'type': 'heading', 'original': stripped_line, 'translated': None})
-                    print(f"L{line_num}: Found Heading: {stripped_line}")
-                    current_speaker = None # Reset speaker after a major heading
-                    continue
-
-                # Check for Act/Scene markers
-                elif stripped_line.startswith("ACT ") or stripped_line.startswith("SCENE "):
-                    play_structure.append({'type': 'scene_marker', 'original': stripped_line, 'translated': None})
-                    current_speaker = None
-                    print(f"L{line_num}: Found Scene Marker: {stripped_line}")
-                    continue
-
-                # General Heading Check (e.g., other ALL CAPS lines NOT matching speaker format)
-                # Placed BEFORE speaker check now
-                elif stripped_line.isupper() and not is_likely_speaker:
-                    play_structure.append({'type': 'heading', 'original': stripped_line, 'translated': None})
-                    print(f"L{line_num}: Found Heading (General): {stripped_line}") # Debug print
-                    current_speaker = None # Reset speaker after a major heading
-                    continue
-
-                # Check for stage directions (brackets OR common keywords)
-                # Uses checks performed above
-                elif is_bracketed or (starts_with_keyword and not is_likely_speaker):
-                     play_structure.append({'type': 'stage_direction', 'original': stripped_line, 'translated': ''})
-                     print(f"L{line_num}: Found Direction: {stripped_line}")
-                     continue
-
-                # Check for speaker names (only if not classified above)
-                # Uses checks performed above
-                elif is_likely_speaker:
-                    # Check if it's identical to the previous speaker to avoid duplicates if format is weird
-                    new_speaker_name = is_likely_speaker.group(1).strip()
-                    if new_speaker_name != current_speaker:
-                        current_speaker = new_speaker_name
-                        play_structure.append({'type': 'speaker', 'original': current_speaker, 'translated': None})
-                        print(f"L{line_num}: Found Speaker: {current_speaker}")
-                    # else: # Optional: Handle case where speaker name might repeat redundantly
-                    #    print(f"L{line_num}: Skipping redundant speaker: {new_speaker_name}")
-                    continue
-
-                # Assume it's dialogue if a speaker is currently set
-                elif current_speaker:
-                    play_structure.append({'type': 'dialogue', 'original': stripped_line, 'translated': ''})
-                    # print(f"L{line_num}: Found Dialogue: {stripped_line}") # Keep commented unless debugging dialogue
-                    continue
-
-                # Handle lines that don't match any known type LAST
-                else:
-                     play_structure.append({'type': 'unknown', 'original': stripped_line, 'translated': None})
-                     print(f"L{line_num}: Found Unknown: {stripped_line}")
-
-                 # --- End the main conditional chain ---
-
+        return list(iter_play(filepath))
     except Exception as e:
-        print(f"Error reading or parsing file on line {line_num if 'line_num' in locals() else 'unknown'}: {e}")
+        print(f"Error reading or parsing file: {e}")
         # Optionally re-raise the exception if you want the program to stop on error
         # raise e
         return [] # Return empty list on error
 
-    return play_structure
+def iter_play(filepath):
+    """
+    Parses a plain text file of a play, yielding one element at a time.
+
+    Classification is identical to parse_play. The source lines are read and
+    stripped up front; only the elements are streamed, one per classified line.
+
+    Args:
+        filepath (str): The path to the input text file.
+
+    Yields:
+        dict: An element (heading, scene_marker, speaker, dialogue, stage_direction, unknown).
+    """
+    if not os.path.exists(filepath):
+        raise FileNotFoundError(f"Input file not found at: {filepath}")
+
+    current_speaker = None
+
+    # Use 'utf-8-sig' to automatically handle/remove the BOM if present.
+    # The play is small, so read it in one call and strip every line up front;
+    # split('\n') rather than splitlines() splits exactly where iterating the file would.
+    with open(filepath, 'r', encoding='utf-8-sig') as f:
+        stripped_lines = [line.strip() for line in f.read().split('\n')]
+
+    for line_num, stripped_line in enumerate(stripped_lines, 1): # Add line number for debugging if needed
+        # Skip empty lines
+        if not stripped_line:
+            continue
+
+        # --- Perform necessary checks ONCE per line, UPFRONT ---
+        # Calculate these flags/matches for use in the conditional logic below
+        is_bracketed = _BRACKET_PAIRS.get(stripped_line[0]) == stripped_line[-1]
+        line_match = _LINE_RE.match(stripped_line)
+        kind = line_match.lastgroup if line_match else None
+        # --- End upfront checks ---
+
+
+        # --- Start the main conditional chain to classify the line type ---
+        # Order Matters! Check most specific types first.
+
+        # Check for specific known headings first
+        if kind == 'prologue': # Specific check is robust
+            yield {'type': 'heading', 'original': stripped_line, 'translated': None}
+            log.debug("L%d: Found Heading: %s", line_num, stripped_line)
+            current_speaker = None # Reset speaker after a major heading
+            continue
+
+        # Check for Act/Scene markers
+        elif kind == 'scene':
+            yield {'type': 'scene_marker', 'original': stripped_line, 'translated': None}
+            current_speaker = None
+            log.debug("L%d: Found Scene Marker: %s", line_num, stripped_line)
+            continue
+
+        # General Heading Check (e.g., other ALL CAPS lines NOT matching speaker format)
+        # Placed BEFORE speaker check now
+        elif stripped_line.isupper() and kind != 'speaker':
+            yield {'type': 'heading', 'original': stripped_line, 'translated': None}
+            log.debug("L%d: Found Heading (General): %s", line_num, stripped_line)
+            current_speaker = None # Reset speaker after a major heading
+            continue
+
+        # Check for stage directions (brackets OR common keywords)
+        # Uses checks performed above
+        elif is_bracketed or kind == 'keyword':
+             yield {'type': 'stage_direction', 'original': stripped_line, 'translated': ''}
+             log.debug("L%d: Found Direction: %s", line_num, stripped_line)
+             continue
+
+        # Check for speaker names (only if not classified above)
+        # Uses checks performed above
+        elif kind == 'speaker':
+            # Check if it's identical to the previous speaker to avoid duplicates if format is weird
+            # Interned: the same few dozen names recur on thousands of speaker rows
+            new_speaker_name = sys.intern(line_match.group('name').strip())
+            if new_speaker_name != current_speaker:
+                current_speaker = new_speaker_name
+                yield {'type': 'speaker', 'original': current_speaker, 'translated': None}
+                log.debug("L%d: Found Speaker: %s", line_num, current_speaker)
+            # else: # Optional: Handle case where speaker name might repeat redundantly
+            #    log.debug("L%d: Skipping redundant speaker: %s", line_num, new_speaker_name)
+            continue
+
+        # Assume it's dialogue if a speaker is currently set
+        elif current_speaker:
+            yield {'type': 'dialogue', 'original': stripped_line, 'translated': ''}
+            # log.debug("L%d: Found Dialogue: %s", line_num, stripped_line) # Keep commented unless debugging dialogue
+            continue
+
+        # Handle lines that don't match any known type LAST
+        else:
+             yield {'type': 'unknown', 'original': stripped_line, 'translated': None}
+             log.debug("L%d: Found Unknown: %s", line_num, stripped_line)
+
+         # --- End the main conditional chain ---
 
 # Example usage block for testing the parser directly
 if __name__ == '__main__':
@@ -126,6 +154,7 @@ if __name__ == '__main__':
              # Fallback if running script from within src directory
              data_file = os.path.join('..', 'data', 'romeo_and_juliet.txt')
 
+        logging.basicConfig(level=logging.DEBUG, format='%(message)s') # Show per-line classification
         print(f"Attempting to parse: {data_file}")
         parsed_play = parse_play(data_file)
 
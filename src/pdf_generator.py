@@ -1,24 +1,63 @@
 import os
 import re
+import copy
+from functools import lru_cache
+from reportlab.platypus.paragraph import cleanBlockQuotedText
 from reportlab.platypus import BaseDocTemplate, PageTemplate, Frame, Paragraph, Spacer, Table, TableStyle, NextPageTemplate, PageBreak
 from reportlab.lib.units import inch, cm
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_JUSTIFY
 from reportlab.lib import colors
 import datetime
+from concurrent.futures import ProcessPoolExecutor
 from src.front_matter import get_front_matter_story # Ensure this import is correct
 
 # --- Helper for Roman Numerals ---
+_ROMAN_VAL = (1000, 900, 500, 400, 100, 90, 50, 40, 10, 9, 5, 4, 1)
+_ROMAN_SYB = ("m", "cm", "d", "cd", "c", "xc", "l", "xl", "x", "ix", "v", "iv", "i")
+
+@lru_cache(maxsize=64) # Front-matter page numbers are converted on every page draw
 def int_to_roman(num):
     # (Keep the int_to_roman function as defined previously)
     if not 0 < num < 4000: return str(num)
-    val = [1000, 900, 500, 400, 100, 90, 50, 40, 10, 9, 5, 4, 1]
-    syb = ["m", "cm", "d", "cd", "c", "xc", "l", "xl", "x", "ix", "v", "iv", "i"]
-    roman_num = ''; i = 0
-    while num > 0:
-        for _ in range(num // val[i]): roman_num += syb[i]; num -= val[i]
-        i += 1
-    return roman_num
+    parts = []
+    for val, syb in zip(_ROMAN_VAL, _ROMAN_SYB):
+        count, num = divmod(num, val)
+        if count: parts.append(syb * count)
+    return ''.join(parts)
+
+# --- Cached Paragraphs for repeating text ---
+# Speaker names, headings and stage directions repeat throughout the play.
+# Parsing their markup is the expensive part of building a Paragraph, so one
+# parsed prototype is kept per (text, style) and each use gets a shallow copy.
+# Copies are required: the doc template records layout state (e.g. _postponed)
+# on the flowable instance itself, so one instance must not appear twice in a story.
+_para_cache = {}
+
+def _para(text, style):
+    key = (text, style.name)
+    prototype = _para_cache.get(key)
+    if prototype is None:
+        prototype = _para_cache[key] = Paragraph(text, style)
+    return copy.copy(prototype)
+
+# --- Plain-text Paragraphs ---
+# Most dialogue is a single line with no markup, for which ReportLab's parser
+# only produces one fragment holding the whitespace-cleaned text in the
+# paragraph's style. That fragment is parsed once per style and copied.
+_plain_frag_cache = {}
+
+def _text_para(text, style):
+    cleaned_text = cleanBlockQuotedText(text)
+    # Markup, line breaks and blank text (no fragments at all) go through the parser
+    if not cleaned_text or '<' in text or '&' in text or '\n' in text:
+        return Paragraph(text.replace('\n', '<br/>'), style)
+    frag_prototype = _plain_frag_cache.get(style.name)
+    if frag_prototype is None:
+        frag_prototype = _plain_frag_cache[style.name] = Paragraph('x', style).frags[0]
+    frag = copy.copy(frag_prototype)
+    frag.text = cleaned_text
+    return Paragraph(cleaned_text, style, frags=[frag])
 
 # --- KDP Constants (8.25x11 Hardback, >151 pages) ---
 PAGE_WIDTH = 8.25 * inch
@@ -34,43 +73,216 @@ USABLE_WIDTH = PAGE_WIDTH - GUTTER_MARGIN - OUTSIDE_MARGIN
 COLUMN_WIDTH = (USABLE_WIDTH - COLUMN_GAP) / 2
 FRAME_HEIGHT = PAGE_HEIGHT - TOP_MARGIN - BOTTOM_MARGIN # Approx 9.5 inches = 684 points
 
-print(f"--- PDF Settings ---")
-print(f"Page Size: {PAGE_WIDTH/inch}\" x {PAGE_HEIGHT/inch}\"")
-print(f"Margins (In/Out/Top/Bot): {GUTTER_MARGIN/inch}\" / {OUTSIDE_MARGIN/inch}\" / {TOP_MARGIN/inch}\" / {BOTTOM_MARGIN/inch}\"")
-print(f"Usable Width: {USABLE_WIDTH/inch}\"")
-print(f"Column Width: {COLUMN_WIDTH/inch}\"")
-print(f"Frame Height: {FRAME_HEIGHT/inch}\" ({FRAME_HEIGHT} points)")
-print(f"--- End PDF Settings ---")
-
-
-# --- Page Numbering Functions (Unchanged) ---
-_main_content_start_page = None
-
-def _draw_page_number_base(canvas, doc, number_format_func):
-    page_num = canvas.getPageNumber()
-    try: text = number_format_func(page_num)
-    except Exception: text = str(page_num)
+# Vertical gaps in the main body. A fresh Spacer is made for each use: the doc
+# template marks a flowable that had to move to the next frame as _postponed,
+# and a shared instance moved a second time raises LayoutError.
+GAP_BEFORE_SPEAKER = 0.05 * inch
+GAP_AFTER_HEADING = 0.1 * inch
+GAP_AROUND_DIRECTION = 0.08 * inch
+GAP_AFTER_DIALOGUE = 0.05 * inch
+
+# --- Dialogue Table Layout ---
+# Shared by every dialogue Table; Table.setStyle only reads the commands
+DIALOGUE_TABLE_STYLE = TableStyle([
+    ('VALIGN', (0,0), (-1,-1), 'TOP'),
+    ('GRID', (0,0), (-1,-1), 0.5, colors.transparent), # Invisible grid
+    ('LEFTPADDING', (0,0), (-1,-1), 0), ('RIGHTPADDING', (0,0), (-1,-1), 0),
+    ('TOPPADDING', (0,0), (-1,-1), 0),
+    ('BOTTOMPADDING', (0,0), (-1,-1), 1 + GAP_AFTER_DIALOGUE), # Minimal padding + gap after each speech
+])
+DIALOGUE_COL_WIDTHS = (COLUMN_WIDTH, COLUMN_WIDTH) # Original | Translation
+
+def print_pdf_settings():
+    """Prints the page geometry used for the ReportLab PDF."""
+    print(f"--- PDF Settings ---")
+    print(f"Page Size: {PAGE_WIDTH/inch}\" x {PAGE_HEIGHT/inch}\"")
+    print(f"Margins (In/Out/Top/Bot): {GUTTER_MARGIN/inch}\" / {OUTSIDE_MARGIN/inch}\" / {TOP_MARGIN/inch}\" / {BOTTOM_MARGIN/inch}\"")
+    print(f"Usable Width: {USABLE_WIDTH/inch}\"")
+    print(f"Column Width: {COLUMN_WIDTH/inch}\"")
+    print(f"Frame Height: {FRAME_HEIGHT/inch}\" ({FRAME_HEIGHT} points)")
+    print(f"--- End PDF Settings ---")
+
+
+# --- Page Numbering Functions ---
+PAGE_NUMBER_X = PAGE_WIDTH / 2 # Centred
+PAGE_NUMBER_Y = 0.5 * inch
+
+def _draw_page_number_base(canvas, text):
     canvas.saveState()
     canvas.setFont('Helvetica', 9)
-    x_position = PAGE_WIDTH / 2
-    y_position = 0.5 * inch
-    canvas.drawCentredString(x_position, y_position, text)
+    canvas.drawCentredString(PAGE_NUMBER_X, PAGE_NUMBER_Y, text)
     canvas.restoreState()
 
 def draw_roman_page_number(canvas, doc):
-    _draw_page_number_base(canvas, doc, int_to_roman)
+    _draw_page_number_base(canvas, int_to_roman(canvas.getPageNumber())) # Memoized per page number
+
+def record_main_content_start(canvas, doc):
+    # Run as each front-matter page ends: the main body starts on the next page.
+    # Kept on the document being built, so concurrent builds don't share it.
+    doc._main_content_start_page = canvas.getPageNumber() + 1
 
 def draw_arabic_page_number(canvas, doc):
-    global _main_content_start_page
     current_abs_page = canvas.getPageNumber()
-    if _main_content_start_page is None:
-         _main_content_start_page = current_abs_page
-    display_page_num = max(1, current_abs_page - _main_content_start_page + 1)
-    _draw_page_number_base(canvas, doc, lambda num: str(display_page_num))
+    display_page_num = max(1, current_abs_page - doc._main_content_start_page + 1)
+    _draw_page_number_base(canvas, str(display_page_num))
+
+# --- Streaming Story ---
+STORY_LOOKAHEAD = 64 # Flowables generated ahead of the one being laid out
+
+class StreamingStory(list):
+    """
+    A story list that fills itself from an iterator while the document is built.
+
+    BaseDocTemplate.build() checks len(story) before laying out each flowable
+    and handle_flowable() only looks a few flowables ahead, so topping the list
+    up to STORY_LOOKAHEAD items on every len() keeps just a small window of
+    the story in memory. It also keeps the build's repeated del story[0] cheap.
+    """
+
+    def __init__(self, flowables, source):
+        super().__init__(flowables)
+        self._source = source
+
+    def __len__(self):
+        while self._source is not None and list.__len__(self) < STORY_LOOKAHEAD:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+        return list.__len__(self)
+
+def _dialogue_table(rows):
+    """
+    Builds one table for a run of consecutive dialogue elements.
+
+    Args:
+        rows (list): [original, translation] flowable pairs, one per element.
+
+    Returns:
+        Table: The dialogue table, splittable between and within rows.
+    """
+    # A speech taller than the space left is split inside its row by ReportLab
+    return Table(rows,
+                 colWidths=DIALOGUE_COL_WIDTHS,
+                 style=DIALOGUE_TABLE_STYLE,
+                 splitByRow=1, # <<< ALLOW SPLITTING BETWEEN ROWS
+                 splitInRow=1)
+
+# --- Main Body Element Handlers ---
+# Each handler returns the flowables for one element of the play structure.
+SPEAKER_NO_GAP_AFTER = ('heading', 'scene_marker', 'speaker') # No extra space before a speaker after these
+
+def _heading_flowables(element, styles, previous_type):
+    return (_para(element['original'], styles['Heading']), Spacer(1, GAP_AFTER_HEADING))
+
+def _scene_marker_flowables(element, styles, previous_type):
+    return (_para(element['original'], styles['Scenemarker']), Spacer(1, GAP_AFTER_HEADING))
+
+def _speaker_flowables(element, styles, previous_type):
+    speaker_para = _para(element['original'], styles['Speaker'])
+    if previous_type is not None and previous_type not in SPEAKER_NO_GAP_AFTER:
+        return (Spacer(1, GAP_BEFORE_SPEAKER), speaker_para)
+    return (speaker_para,)
+
+def _stage_direction_flowables(element, styles, previous_type):
+    cleaned_original_text = element['original'].replace('_', '')
+    return (Spacer(1, GAP_AROUND_DIRECTION),
+            _para(cleaned_original_text, styles['StageDirectionCentered']),
+            Spacer(1, GAP_AROUND_DIRECTION))
+
+# Dialogue is not in here: consecutive dialogue elements share one table, see _dialogue_row
+MAIN_BODY_HANDLERS = {
+    'heading': _heading_flowables,
+    'scene_marker': _scene_marker_flowables,
+    'speaker': _speaker_flowables,
+    'stage_direction': _stage_direction_flowables,
+}
+
+def _dialogue_row(element, dialogue_styles):
+    """
+    Builds the [original, translation] table row for one dialogue element.
+
+    Args:
+        element (dict): The dialogue element.
+        dialogue_styles (tuple): The OriginalText, TranslatedText and ErrorText
+                                 styles, looked up once per document.
+
+    Returns:
+        list: The original and translation flowables.
+    """
+    original_style, translated_style, error_style = dialogue_styles
+    original_text = element['original']
+    raw_translated_text = element.get('translated') or ""
+    p_orig = _text_para(original_text, original_style)
+    if raw_translated_text == '[Translated as part of previous chunk]':
+        p_trans = Spacer(0, 0)
+    elif raw_translated_text.startswith('[Translation'):
+        p_trans = Paragraph(raw_translated_text, error_style)
+    else:
+        p_trans = _text_para(raw_translated_text, translated_style)
+    return [p_orig, p_trans]
+
+def _iter_main_body(play_structure, styles):
+    """
+    Yields the main-body flowables for the play structure, in story order.
+
+    Args:
+        play_structure (list): List of dictionaries representing the play.
+        styles (StyleSheet1): Stylesheet holding the custom paragraph styles.
+    """
+    print("Processing play structure elements for main body...")
+    item_count = 0
+
+    dialogue_styles = (styles['OriginalText'], styles['TranslatedText'], styles['ErrorText'])
+
+    # Type of the previous element, tracked here instead of indexing back into play_structure
+    previous_type = None
+    # Rows of the current run of dialogue elements, emitted as one table
+    pending_rows = []
+    for element in play_structure:
+        el_type = element['type']
+        if el_type == 'dialogue':
+            pending_rows.append(_dialogue_row(element, dialogue_styles))
+            item_count += 1
+        else:
+            if pending_rows:
+                yield _dialogue_table(pending_rows)
+                pending_rows = []
+            handler = MAIN_BODY_HANDLERS.get(el_type)
+            if handler is not None: # 'unknown' elements are skipped
+                yield from handler(element, styles, previous_type)
+                item_count += 1
+        previous_type = el_type
+
+    if pending_rows:
+        yield _dialogue_table(pending_rows)
+
+    print(f"Added {item_count} elements to the PDF story.")
+
+# --- Paragraph Styles ---
+@lru_cache(maxsize=1)
+def get_styles():
+    """
+    Returns the stylesheet used by the PDF, built on first use.
+
+    The same sheet is shared by every create_side_by_side_pdf call, so
+    callers must not add or modify styles on it.
+    """
+    styles = getSampleStyleSheet()
+    styles.add(ParagraphStyle(name='OriginalText', parent=styles['Normal'], fontSize=10, leading=12, alignment=TA_LEFT, spaceBefore=0, spaceAfter=0))
+    styles.add(ParagraphStyle(name='TranslatedText', parent=styles['Normal'], fontSize=10, leading=12, alignment=TA_LEFT, spaceBefore=0, spaceAfter=0))
+    styles.add(ParagraphStyle(name='Speaker', parent=styles['Normal'], fontSize=10, leading=12, alignment=TA_CENTER, spaceBefore=4, spaceAfter=2, fontName='Helvetica-Bold'))
+    styles.add(ParagraphStyle(name='Heading', parent=styles['h1'], fontSize=14, leading=16, alignment=TA_CENTER, spaceAfter=12, spaceBefore=12))
+    styles.add(ParagraphStyle(name='Scenemarker', parent=styles['h2'], fontSize=12, leading=14, alignment=TA_CENTER, spaceAfter=10, spaceBefore=10)) # Corrected name
+    styles.add(ParagraphStyle(name='StageDirectionCentered', parent=styles['Normal'], fontSize=9, leading=11, alignment=TA_CENTER, fontName='Helvetica-Oblique', spaceBefore=6, spaceAfter=6))
+    styles.add(ParagraphStyle(name='ErrorText', parent=styles['TranslatedText'], textColor=colors.red))
+    styles.add(ParagraphStyle(name='CopyrightStyle', parent=styles['Normal'], fontSize=8, leading=10, alignment=TA_LEFT, spaceBefore=6, spaceAfter=6))
+    return styles
 
 # --- Main PDF Creation Function ---
 def create_side_by_side_pdf(play_structure, output_filepath):
     print(f"Starting PDF generation: {output_filepath}")
+    print_pdf_settings()
     doc = BaseDocTemplate(output_filepath,
                           pagesize=(PAGE_WIDTH, PAGE_HEIGHT),
                           title="Romeo and Juliet - Vernacular Translation",
@@ -83,22 +295,16 @@ def create_side_by_side_pdf(play_structure, output_filepath):
                        id='main', leftPadding=6, bottomPadding=6, rightPadding=6, topPadding=6)
 
     # --- Define Page Templates ---
-    front_matter_template = PageTemplate(id='front_matter', frames=[main_frame], onPage=draw_roman_page_number)
+    front_matter_template = PageTemplate(id='front_matter', frames=[main_frame], onPage=draw_roman_page_number,
+                                         onPageEnd=record_main_content_start)
     main_body_template = PageTemplate(id='main_body', frames=[main_frame], onPage=draw_arabic_page_number)
-    doc.addPageTemplates([front_matter_template, main_body_template])
+    doc._main_content_start_page = 1 # Moved past the front matter by record_main_content_start
 
-    # --- Define Paragraph Styles ---
-    styles = getSampleStyleSheet()
-    styles.add(ParagraphStyle(name='OriginalText', parent=styles['Normal'], fontSize=10, leading=12, alignment=TA_LEFT, spaceBefore=0, spaceAfter=0))
-    styles.add(ParagraphStyle(name='TranslatedText', parent=styles['Normal'], fontSize=10, leading=12, alignment=TA_LEFT, spaceBefore=0, spaceAfter=0))
-    styles.add(ParagraphStyle(name='Speaker', parent=styles['Normal'], fontSize=10, leading=12, alignment=TA_CENTER, spaceBefore=4, spaceAfter=2, fontName='Helvetica-Bold'))
-    styles.add(ParagraphStyle(name='Heading', parent=styles['h1'], fontSize=14, leading=16, alignment=TA_CENTER, spaceAfter=12, spaceBefore=12))
-    styles.add(ParagraphStyle(name='Scenemarker', parent=styles['h2'], fontSize=12, leading=14, alignment=TA_CENTER, spaceAfter=10, spaceBefore=10)) # Corrected name
-    styles.add(ParagraphStyle(name='StageDirectionCentered', parent=styles['Normal'], fontSize=9, leading=11, alignment=TA_CENTER, fontName='Helvetica-Oblique', spaceBefore=6, spaceAfter=6))
-    styles.add(ParagraphStyle(name='ErrorText', parent=styles['TranslatedText'], textColor=colors.red))
-    styles.add(ParagraphStyle(name='CopyrightStyle', parent=styles['Normal'], fontSize=8, leading=10, alignment=TA_LEFT, spaceBefore=6, spaceAfter=6))
+    # --- Paragraph Styles ---
+    styles = get_styles()
 
     # --- Build Story ---
+    _para_cache.clear() # Prototypes are only kept for one document
     story = []
     print("Adding front matter...")
     book_title = "Romeo and Juliet: A Contemporary Vernacular Adaptation"
@@ -109,137 +315,52 @@ def create_side_by_side_pdf(play_structure, output_filepath):
     front_matter_flowables = get_front_matter_story(styles, book_title, book_subtitle, adapter_name, copyright_holder, current_year)
     story.extend(front_matter_flowables)
 
-    # Switch template and force page break
-    story.append(NextPageTemplate('main_body'))
-    story.append(PageBreak())
-    global _main_content_start_page
-    _main_content_start_page = None
-
-    print("Processing play structure elements for main body...")
-    item_count = 0
-
-    for index, element in enumerate(play_structure):
-        el_type = element.get('type')
-        original_text = element.get('original', '')
-        raw_translated_text = element.get('translated', '') or ""
-        trans_style_to_use = styles['ErrorText'] if raw_translated_text.startswith('[Translation') else styles['TranslatedText']
-
-        # --- Handle Different Element Types ---
-        if el_type in ['heading', 'scenemarker', 'speaker']: # Corrected 'Scenemarker' name usage
-            style_name = el_type.replace('_', '').capitalize()
-            if style_name == 'Speaker' and index > 0 and play_structure[index-1].get('type') not in ['heading', 'scenemarker', 'speaker']:
-                 story.append(Spacer(1, 0.05*inch))
-            story.append(Paragraph(original_text, styles[style_name]))
-            if style_name in ['Heading', 'Scenemarker']: story.append(Spacer(1, 0.1*inch))
-            item_count += 1
-        elif el_type == 'stage_direction':
-             cleaned_original_text = original_text.replace('_', '')
-             story.append(Spacer(1, 0.08*inch))
-             story.append(Paragraph(cleaned_original_text, styles['StageDirectionCentered']))
-             story.append(Spacer(1, 0.08*inch))
-             item_count += 1
-        elif el_type == 'dialogue':
-            # --- Using Pre-Splitting into Multi-Row Table Logic ---
-            table_data = []
-            processed_dialogue = False
-
-            if raw_translated_text == '[Translated as part of previous chunk]':
-                p_orig = Paragraph(original_text.replace('\n', '<br/>'), styles['OriginalText'])
-                p_trans = Spacer(0, 0)
-                table_data = [[p_orig, p_trans]] # Single row
-                processed_dialogue = True
-            elif raw_translated_text.startswith('[Translation'):
-                p_orig = Paragraph(original_text.replace('\n', '<br/>'), styles['OriginalText'])
-                p_trans = Paragraph(raw_translated_text, styles['ErrorText'])
-                table_data = [[p_orig, p_trans]] # Single row
-                processed_dialogue = True
-            else:
-                # --- Actual Translation: Split into multiple rows based on character count ---
-                MAX_CHARS_PER_SUBCHUNK = 1200 # Using a reasonable threshold
-
-                orig_len = len(original_text)
-                trans_len = len(raw_translated_text)
-                should_split = (orig_len > MAX_CHARS_PER_SUBCHUNK or trans_len > MAX_CHARS_PER_SUBCHUNK)
-
-                if not should_split:
-                    # Short enough, treat as single row
-                    p_orig = Paragraph(original_text.replace('\n', '<br/>'), styles['OriginalText'])
-                    p_trans = Paragraph(raw_translated_text.replace('\n', '<br/>'), trans_style_to_use)
-                    table_data = [[p_orig, p_trans]]
-                else:
-                    # Needs splitting
-                    print(f"Info: Splitting dialogue chunk (approx {orig_len}/{trans_len} chars) starting element {index}...")
-                    if orig_len > trans_len:
-                        longer_text, shorter_text = original_text, raw_translated_text
-                        longer_len, shorter_len = orig_len, trans_len
-                        longer_style, shorter_style = styles['OriginalText'], styles['TranslatedText']
-                        is_orig_longer = True
-                    else:
-                        longer_text, shorter_text = raw_translated_text, original_text
-                        longer_len, shorter_len = trans_len, orig_len
-                        longer_style, shorter_style = styles['TranslatedText'], styles['OriginalText']
-                        is_orig_longer = False
-
-                    num_splits = max(1, (longer_len + MAX_CHARS_PER_SUBCHUNK - 1) // MAX_CHARS_PER_SUBCHUNK)
-                    start_longer_idx, start_shorter_idx = 0, 0
-
-                    for i in range(num_splits):
-                        # Calculate proportional endpoints
-                        prop_end_longer = int(longer_len * (i + 1) / num_splits)
-                        prop_end_shorter = int(shorter_len * (i + 1) / num_splits)
-
-                        # Find simple break points (use proportional end or full length)
-                        end_longer_idx = prop_end_longer if i < num_splits - 1 else longer_len
-                        end_shorter_idx = prop_end_shorter if i < num_splits - 1 else shorter_len
-
-                        # Extract sub-chunks, replace newlines with <br/> for Paragraph
-                        longer_sub_chunk = longer_text[start_longer_idx:end_longer_idx].strip().replace('\n', '<br/>')
-                        shorter_sub_chunk = shorter_text[start_shorter_idx:end_shorter_idx].strip().replace('\n', '<br/>')
-
-                        p_longer = Paragraph(longer_sub_chunk, longer_style) if longer_sub_chunk else Spacer(0,0)
-                        p_shorter = Paragraph(shorter_sub_chunk, shorter_style) if shorter_sub_chunk else Spacer(0,0)
-
-                        # Add row in correct order
-                        if is_orig_longer: table_data.append([p_longer, p_shorter])
-                        else: table_data.append([p_shorter, p_longer])
-
-                        start_longer_idx = end_longer_idx
-                        start_shorter_idx = end_shorter_idx
-
-                processed_dialogue = True
-
-
-            # --- Create and append the Table ---
-            if processed_dialogue and table_data:
-                ts = TableStyle([
-                    ('VALIGN', (0,0), (-1,-1), 'TOP'),
-                    ('GRID', (0,0), (-1,-1), 0.5, colors.transparent), # Invisible grid
-                    ('LEFTPADDING', (0,0), (-1,-1), 0), ('RIGHTPADDING', (0,0), (-1,-1), 0),
-                    ('TOPPADDING', (0,0), (-1,-1), 0), ('BOTTOMPADDING', (0,0), (-1,-1), 1), # Minimal padding
-                ])
-                # Create the table, ALWAYS allowing splitting BETWEEN rows
-                dialogue_table = Table(table_data,
-                                     colWidths=[COLUMN_WIDTH, COLUMN_WIDTH],
-                                     style=ts,
-                                     splitByRow=1) # <<< ALLOW SPLITTING BETWEEN ROWS
-                story.append(dialogue_table)
-                story.append(Spacer(1, 0.05*inch)) # Spacer AFTER the speech/element
-                item_count += 1
-            elif not processed_dialogue:
-                 print(f"Warning: Dialogue element {index} did not produce table data.")
-                 item_count += 1
-
-        # else: ignore 'unknown' type
-
-    print(f"Added {item_count} elements to the PDF story.")
+    # Switch template for the page after the front matter. The switch has to
+    # come before the break ending the front matter, or a blank front-matter
+    # page is inserted ahead of the main body.
+    if not story:
+        doc.addPageTemplates([main_body_template])
+    else:
+        doc.addPageTemplates([front_matter_template, main_body_template])
+        if isinstance(story[-1], PageBreak):
+            story.insert(-1, NextPageTemplate('main_body'))
+        else:
+            story.append(NextPageTemplate('main_body'))
+            story.append(PageBreak())
+
+    # The main body is generated while the document is built (see StreamingStory)
+    story = StreamingStory(story, _iter_main_body(play_structure, styles))
 
     # --- Build the PDF ---
     print("Building PDF document...")
     try:
-        _main_content_start_page = None # Reset before build
         doc.build(story)
         print(f"PDF generated successfully: {output_filepath}")
     except Exception as e:
         print(f"Error building PDF: {e}")
         import traceback
-        traceback.print_exc() # Print full traceback
\ No newline at end of file
+        traceback.print_exc() # Print full traceback
+
+# --- Batch PDF Creation ---
+def _create_pdf_job(job):
+    play_structure, output_filepath = job
+    create_side_by_side_pdf(play_structure, output_filepath)
+    return output_filepath
+
+def create_pdfs_batch(jobs, max_workers=None):
+    """
+    Builds several side-by-side PDFs in parallel, one document per process.
+
+    ReportLab lays out a single document sequentially, so separate editions or
+    chapters are spread over worker processes instead. Each worker builds the
+    shared stylesheet once when it starts and reuses it for all its documents.
+
+    Args:
+        jobs (list): (play_structure, output_filepath) pairs.
+        max_workers (int): Number of worker processes; defaults to the CPU count.
+
+    Returns:
+        list: The output file paths, in the order of `jobs`.
+    """
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=get_styles) as executor:
+        return list(executor.map(_create_pdf_job, jobs))
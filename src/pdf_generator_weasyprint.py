@@ -1,8 +1,8 @@
 import os
-import weasyprint
 import datetime
 import html # For escaping
 import sys
+import multiprocessing
 
 # Ensure the front_matter helper can be found
 try:
@@ -22,6 +22,95 @@ OUTSIDE_MARGIN_IN = 0.5
 TOP_MARGIN_IN = 0.75
 BOTTOM_MARGIN_IN = 0.75
 
+# --- HTML Helpers ---
+def _escape(text):
+    # html.escape() always runs five str.replace passes, but almost no line of
+    # the play contains a character it rewrites (quotes included, as
+    # quote=True). Plain substring tests are cheaper than a regex search here.
+    if '&' in text or '<' in text or '>' in text or '"' in text or "'" in text:
+        return html.escape(text)
+    return text
+
+def _lines_to_paragraphs(text):
+    """
+    Renders text as one <p> per line for a dialogue column.
+
+    Blank lines in multi-line text become &nbsp; paragraphs so the spacing is
+    kept; text with a single blank line renders as nothing.
+
+    Args:
+        text (str): The (unescaped) column text.
+
+    Returns:
+        str: The escaped paragraphs, one per line, each ending in a newline.
+    """
+    if '\n' not in text:
+        line = text.strip()
+        return f'    <p>{_escape(line)}</p>\n' if line else ''
+    lines = text.split('\n')
+    body = '</p>\n    <p>'.join(_escape(line.strip()) or '&nbsp;' for line in lines)
+    return f'    <p>{body}</p>\n'
+
+# --- Element Handlers ---
+# Each handler returns the HTML for one element of the play structure.
+def _heading_html(element):
+    original_text = element.get('original', '')
+    return f'<h1 class="heading">{_escape(original_text)}</h1>\n'
+
+def _scene_marker_html(element):
+    original_text = element.get('original', '')
+    return f'<h2 class="scenemarker">{_escape(original_text)}</h2>\n'
+
+def _speaker_html(element):
+    original_text = element.get('original', '')
+    return f'<p class="speaker">{_escape(original_text)}</p>\n'
+
+def _stage_direction_html(element):
+    cleaned_original_text = element.get('original', '').replace('_', '') # Clean underscores
+    return f'<p class="direction">{_escape(cleaned_original_text)}</p>\n'
+
+def _dialogue_html(element):
+    raw_translated_text = element.get('translated', '') or ""
+
+    # --- Left Column (Original Text - Multiple <p> tags) ---
+    original_html = _lines_to_paragraphs(element.get('original', ''))
+
+    # --- Right Column (Translated Text - Multiple <p> tags) ---
+    if raw_translated_text == '[Translated as part of previous chunk]':
+        translated_html = '    <p class="placeholder">&nbsp;</p>\n'
+    elif raw_translated_text.startswith('[Translation'):
+        translated_html = f'    <p class="error">{_escape(raw_translated_text)}</p>\n'
+    else:
+        translated_html = _lines_to_paragraphs(raw_translated_text)
+
+    # Container for the side-by-side pair
+    return (f'<div class="dialogue-pair">\n'
+            f'  <div class="col-left">\n{original_html}  </div>\n'
+            f'  <div class="col-right">\n{translated_html}  </div>\n'
+            '</div>\n') # End col-right, end dialogue-pair
+
+ELEMENT_HTML_HANDLERS = {
+    'heading': _heading_html,
+    'scene_marker': _scene_marker_html,
+    'speaker': _speaker_html,
+    'stage_direction': _stage_direction_html,
+    'dialogue': _dialogue_html,
+}
+
+# --- Stylesheet Cache ---
+# Parsed stylesheet, reused while the file is unchanged; holds one entry
+_css_cache = {}
+
+def _load_css(css_filepath):
+    """Returns the parsed weasyprint.CSS for a file, reparsing only when it changes."""
+    import weasyprint # Only called once the render has already imported it
+    key = (css_filepath, os.path.getmtime(css_filepath))
+    css = _css_cache.get(key)
+    if css is None:
+        _css_cache.clear()
+        css = _css_cache[key] = weasyprint.CSS(filename=css_filepath)
+    return css
+
 # --- Main PDF Creation Function ---
 def create_pdf_weasyprint(play_structure, output_filepath, css_filepath):
     """
@@ -79,87 +168,31 @@ def create_pdf_weasyprint(play_structure, output_filepath, css_filepath):
     html_parts.append('<div class="main-content">') # Div for main content
 
     item_count = 0 # Optional: only for final count printout
-    for index, element in enumerate(play_structure):
-        el_type = element.get('type')
-        original_text = element.get('original', '')
-        if el_type == 'stage_direction':
-             original_text = original_text.replace('_', '') # Clean underscores
-
-        # Convert newlines to <br> for HTML paragraphs WITHIN a single P tag method
-        # original_html = original_text.replace('\n', '<br/>') # Use this if reverting to single P tag per chunk
-
-        # Handle translation similarly
-        raw_translated_text = element.get('translated', '') or ""
-        # translated_html = raw_translated_text.replace('\n', '<br/>') # Use this if reverting
-        is_error_translation = raw_translated_text.startswith('[Translation')
-        is_placeholder_translation = raw_translated_text == '[Translated as part of previous chunk]'
-
-        # --- Append HTML based on element type ---
-        if el_type == 'heading':
-            html_parts.append(f'<h1 class="heading">{html.escape(original_text)}</h1>\n')
-            item_count+=1
-        elif el_type == 'scene_marker':
-            html_parts.append(f'<h2 class="scenemarker">{html.escape(original_text)}</h2>\n')
-            item_count+=1
-        elif el_type == 'speaker':
-             html_parts.append(f'<p class="speaker">{html.escape(original_text)}</p>\n')
-             item_count+=1
-        elif el_type == 'stage_direction':
-             html_parts.append(f'<p class="direction">{html.escape(original_text)}</p>\n') # Use cleaned text
-             item_count+=1
-        elif el_type == 'dialogue':
-             # Container for the side-by-side pair
-             html_parts.append('<div class="dialogue-pair">\n')
-
-             # --- Left Column (Original Text - Multiple <p> tags) ---
-             html_parts.append('  <div class="col-left">\n')
-             original_lines = original_text.split('\n')
-             for line in original_lines:
-                 stripped_line = line.strip()
-                 if stripped_line:
-                      safe_line = html.escape(stripped_line)
-                      html_parts.append(f'    <p>{safe_line}</p>\n')
-                 elif len(original_lines) > 1: # Preserve blank lines between lines
-                      html_parts.append('    <p>&nbsp;</p>\n')
-             html_parts.append('  </div>\n') # End col-left
-
-             # --- Right Column (Translated Text - Multiple <p> tags) ---
-             html_parts.append('  <div class="col-right">\n')
-             if is_placeholder_translation:
-                 html_parts.append('    <p class="placeholder">&nbsp;</p>\n')
-             elif is_error_translation:
-                 safe_error = html.escape(raw_translated_text)
-                 html_parts.append(f'    <p class="error">{safe_error}</p>\n')
-             else:
-                 translated_lines = raw_translated_text.split('\n')
-                 for line in translated_lines:
-                     stripped_line = line.strip()
-                     if stripped_line:
-                         safe_line = html.escape(stripped_line)
-                         html_parts.append(f'    <p>{safe_line}</p>\n')
-                     elif len(translated_lines) > 1: # Preserve blank lines
-                         html_parts.append('    <p>&nbsp;</p>\n')
-             html_parts.append('  </div>\n') # End col-right
-
-             html_parts.append('</div>\n') # end dialogue-pair
-             item_count += 1
-        # else: ignore 'unknown' type
+    for element in play_structure:
+        handler = ELEMENT_HTML_HANDLERS.get(element.get('type'))
+        if handler is not None: # 'unknown' elements are skipped
+            html_parts.append(handler(element))
+            item_count += 1
 
     html_parts.append('</div>\n') # end main-content
     html_parts.append("</body></html>")
     final_html = "".join(html_parts)
+    del html_parts # Only the joined document is kept alive while WeasyPrint renders
     print(f"Generated HTML for {item_count} elements.")
 
     # --- Generate PDF using WeasyPrint ---
     print("Rendering PDF with WeasyPrint...")
     try:
+        # Imported here: WeasyPrint loads Pango/Cairo, which only the render needs
+        import weasyprint
+
         # Ensure output directory exists
         output_dir = os.path.dirname(output_filepath)
         os.makedirs(output_dir, exist_ok=True)
 
         # Use a different variable name for the WeasyPrint HTML object
         html_doc = weasyprint.HTML(string=final_html, base_url=project_root) # Use project root as base URL
-        css = weasyprint.CSS(filename=css_filepath)
+        css = _load_css(css_filepath)
 
         # Use the renamed variable here
         html_doc.write_pdf(output_filepath, stylesheets=[css])
@@ -174,6 +207,31 @@ def create_pdf_weasyprint(play_structure, output_filepath, css_filepath):
         traceback.print_exc()
 
 
+def create_pdf_weasyprint_isolated(play_structure, output_filepath, css_filepath):
+    """
+    Runs create_pdf_weasyprint in a fresh child process.
+
+    WeasyPrint keeps font and stream caches alive after a render, so a process
+    building several PDFs keeps growing. The child's memory is returned to the
+    OS when it exits; use this when generating more than one PDF per run.
+
+    Args:
+        play_structure (list): List of dictionaries representing the play.
+        output_filepath (str): Path to save the generated PDF.
+        css_filepath (str): Path to the CSS file for styling.
+
+    Returns:
+        int: The child's exit code (0 unless the process itself crashed).
+    """
+    # 'spawn' so the child starts clean rather than inheriting this process's heap
+    process = multiprocessing.get_context('spawn').Process(
+        target=create_pdf_weasyprint, args=(play_structure, output_filepath, css_filepath))
+    process.start()
+    process.join()
+    if process.exitcode != 0:
+        print(f"Error: WeasyPrint process exited with code {process.exitcode}")
+    return process.exitcode
+
 # Example usage block for testing the generator directly
 if __name__ == '__main__':
     print("Testing WeasyPrint generator structure (requires dummy data and CSS)...")
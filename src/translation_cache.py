@@ -0,0 +1,55 @@
+# src/translation_cache.py
+import hashlib
+import os
+import pickle
+import shelve
+
+def cache_key(instruction, element_type, speaker, original_text):
+    """
+    Returns the content-addressed key for one chunk's translation.
+
+    Args:
+        instruction (str): The translation instructions; changing the style
+                           invalidates every cached translation.
+        element_type (str): 'dialogue' or 'stage_direction'.
+        speaker (str): Speaker of a dialogue chunk, or None.
+        original_text (str): The chunk's original text.
+
+    Returns:
+        str: Hex BLAKE2b digest of the above.
+    """
+    # The unit separator never occurs in the instruction, types or speaker names
+    material = "\x1f".join((instruction, element_type, speaker or "", original_text.strip()))
+    return hashlib.blake2b(material.encode('utf-8'), digest_size=16).hexdigest()
+
+class TranslationCache:
+    """
+    On-disk cache of finished translations, backed by `shelve`.
+
+    Every put() is written through to the database, so translations cached
+    before a crash or Ctrl+C are still there on the next run. Use it as a
+    context manager so the database is closed on every exit path.
+    """
+
+    def __init__(self, filepath):
+        os.makedirs(os.path.dirname(filepath), exist_ok=True) # Ensure dir exists
+        # Entries written with older protocols remain readable
+        self.db = shelve.open(filepath, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def get(self, key):
+        """Returns the cached translation for `key`, or None if there is none."""
+        return self.db.get(key)
+
+    def put(self, key, translation):
+        """Stores a translation under `key`."""
+        self.db[key] = translation
+
+    def close(self):
+        """Flushes and closes the underlying database."""
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()